@@ -1,10 +1,16 @@
+# Import time to work with token expiry as epoch timestamps
+import time
+# Import Lock so concurrent requests can share the token cache safely
+from threading import Lock
 # Import datetime class to work with dates and times
-from datetime import (
-    datetime,
-    timedelta,  # Used to add/subtract time periods (e.g., add 30 minutes)
-)
-# Import JWT utilities for creating and validating JSON Web Tokens
-from jose import JWTError, jwt  # type: ignore
+from datetime import datetime
+# Import typing helpers for the cached user snapshot
+from typing import NamedTuple, Optional
+# Import TTLCache: a size-bounded dict whose entries expire after a fixed time
+from cachetools import TTLCache  # type: ignore
+# Import JWT utilities (PyJWT) for creating and validating JSON Web Tokens
+import jwt  # type: ignore
+from jwt import PyJWTError as JWTError  # type: ignore
 # Import password hashing context for secure password storage
 from passlib.context import CryptContext  # type: ignore
 # Import FastAPI dependencies and utilities
@@ -13,28 +19,66 @@ from fastapi import (  # type: ignore
     HTTPException,  # Exception class for HTTP errors
     status,  # HTTP status codes (200, 401, etc.)
 )
+# Import run_in_threadpool to run blocking DB calls from async code
+from fastapi.concurrency import run_in_threadpool  # type: ignore
 # Import security utilities for handling Bearer token authentication
 from fastapi.security import (  # type: ignore
     HTTPBearer,  # Handles Bearer token extraction from Authorization header
     HTTPAuthorizationCredentials,  # Type for authorization credentials
 )
-# Import SQLAlchemy Session for database operations
-from sqlalchemy.orm import Session  # type: ignore
 # Import application configuration settings
 from config import get_settings
-# Import database session dependency
-from database import get_db
+# Import the session factory (sessions are only opened on a cache miss)
+from database import SessionLocal
 # Import database models (User model, etc.)
 import models
 
 
 # Get application settings (SECRET_KEY, token expiry time, etc.)
 settings = get_settings()
-# Create password context using bcrypt hashing algorithm
-# "deprecated='auto'" automatically handles outdated hash formats
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Copy the settings read on every token mint/decode into module constants
+# (a plain global lookup instead of an attribute access each time)
+_SECRET_KEY = settings.secret_key
+_ALGO = settings.algorithm
+_ALGOS = [_ALGO]
+_EXP_SECONDS = settings.access_token_expire_minutes * 60
+# Create password context: new hashes use argon2 (cost from config.py)
+# bcrypt is kept only to verify existing hashes; it is marked deprecated
+# so needs_rehash() reports those hashes for upgrade on the next login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    default="argon2",
+    deprecated=["bcrypt"],
+    argon2__rounds=settings.argon2_rounds,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=2,
+)
 # Create HTTPBearer instance for extracting Bearer tokens from requests
-security = HTTPBearer
+security = HTTPBearer()
+# Cache of already-validated tokens: raw token string -> (user_id, exp)
+# Entries live for at most 60 seconds, and never past the token's own "exp"
+_TOKEN_CACHE = TTLCache(maxsize=10_000, ttl=60)
+# TTLCache is not thread-safe; guard it in case threadpool workers touch it
+_TOKEN_CACHE_LOCK = Lock()
+# Cache of user rows: user_id -> CachedUser
+# Short TTL so profile changes made elsewhere show up quickly
+_USER_CACHE = TTLCache(maxsize=5000, ttl=30)
+_USER_CACHE_LOCK = Lock()
+
+
+class CachedUser(NamedTuple):
+    """Detached snapshot of the User columns read by route handlers"""
+    id: int
+    email: str
+    username: str
+    full_name: Optional[str]
+    created_at: datetime
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user from the user cache (call after the row changes)"""
+    with _USER_CACHE_LOCK:
+        _USER_CACHE.pop(user_id, None)
 
 
 def hash_password(password: str) -> str:
@@ -52,33 +96,51 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Check if a stored hash uses an outdated scheme or cost"""
+    # True for bcrypt hashes (deprecated) and argon2 hashes with old settings
+    return pwd_context.needs_update(hashed_password)
+
+
 def create_access_token(data: dict) -> str:
     """Create JWT access token"""
     # Create a copy of the data dictionary to avoid modifying the original
     to_encode = data.copy()
     # Calculate when the token should expire
-    # Gets current UTC time and adds the configured number of minutes
-    expire = datetime.utcnow() + timedelta(
-        minutes=settings.access_token_expire_minutes
-    )
+    # Current epoch time (seconds) plus the configured lifetime; JWT "exp"
+    # is an epoch timestamp anyway, so no datetime objects are needed
+    expire = int(time.time()) + _EXP_SECONDS
     # Add the expiration time to the token payload
     # "exp" is a standard JWT claim for expiration
     to_encode.update({"exp": expire})
     # Encode the data into a JWT token string
     # Uses the secret key and algorithm from settings to sign the token
-    encoded_jwt = jwt.encode(
-        to_encode, settings.secret_key,
-        algorithm=settings.algorithm
-    )
+    encoded_jwt = jwt.encode(to_encode, _SECRET_KEY, algorithm=_ALGO)
     # Return the token as a string (this is what gets sent to the client)
     return encoded_jwt
 
 
-def get_current_user(
+def _load_user(user_id: int) -> Optional[CachedUser]:
+    """Load a user by id and copy it into a CachedUser"""
+    # Open a session just for this lookup, so requests served from the
+    # cache never create one (or pay for get_db's threadpool hops)
+    with SessionLocal() as db:
+        db_user = db.get(models.User, user_id)
+        if db_user is None:
+            return None
+        # Copy the columns into a plain tuple so it can outlive this session
+        return CachedUser(
+            id=db_user.id,
+            email=db_user.email,
+            username=db_user.username,
+            full_name=db_user.full_name,
+            created_at=db_user.created_at,
+        )
+
+
+async def get_current_user(
     # Depends(security) extracts the Bearer token from the Authorization header
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    # Depends(get_db) provides a database session for querying
-    db: Session = Depends(get_db)
 ):
     """Dependency to get current authenticated user"""
     # Create an exception to raise if authentication fails
@@ -88,31 +150,51 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        # Extract the actual token string from the credentials object
-        token = credentials.credentials
-        # Decode and verify the JWT token
-        # This checks the signature and extracts the payload data
-        payload = jwt.decode(
-            token,
-            settings.secret_key,  # Must match the key used to create the token
-            algorithms=[settings.algorithm]  # Must match the algorithm used
-        )
-        # Extract the user ID from the token payload
-        # "sub" (subject) is a standard JWT claim for the user identifier
-        user_id: int = payload.get("sub")
-        # If there's no user ID in the token, it's invalid
-        if user_id is None:
+    # Extract the actual token string from the credentials object
+    token = credentials.credentials
+    # Check if this exact token was already decoded and verified recently
+    with _TOKEN_CACHE_LOCK:
+        cached = _TOKEN_CACHE.get(token)
+    # Cache hit: skip jwt.decode, but still make sure the token has not expired
+    if cached is not None and cached[1] > time.time():
+        user_id = cached[0]
+    else:
+        try:
+            # Decode and verify the JWT token
+            # This checks the signature and extracts the payload data
+            payload = jwt.decode(
+                token,
+                _SECRET_KEY,  # Must match the key used to create it
+                algorithms=_ALGOS  # Must match the algorithm used
+            )
+            # Extract the user ID from the token payload
+            # "sub" (subject) is a standard JWT claim for the user identifier
+            # It is stored as a string, so convert it back to an int
+            user_id = int(payload["sub"])
+            exp = payload["exp"]
+        # If JWT decoding fails (invalid token, expired, wrong signature, etc.)
+        # or the payload is missing the claims we need
+        except (JWTError, KeyError, TypeError, ValueError):
+            # Make sure a previously cached copy of this token is dropped too
+            with _TOKEN_CACHE_LOCK:
+                _TOKEN_CACHE.pop(token, None)
             raise credentials_exception
-    # If JWT decoding fails (invalid token, expired, wrong signature, etc.)
-    except JWTError:
-        raise credentials_exception
-    # Query the database to find the user with this ID
-    # .first() returns the first matching user or None if not found
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+        # Remember the verified token so the next request can skip decoding
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE[token] = (user_id, exp)
+    # Serve the user from the process-wide cache if we saw them recently
+    with _USER_CACHE_LOCK:
+        user = _USER_CACHE.get(user_id)
+    if user is not None:
+        return user
+    # Otherwise load the user from the database
+    # The query is blocking, so run it in the threadpool (cache misses only)
+    user = await run_in_threadpool(_load_user, user_id)
     # If no user found with this ID, the token is invalid
     if user is None:
         raise credentials_exception
-    # Return the user object
+    with _USER_CACHE_LOCK:
+        _USER_CACHE[user_id] = user
+    # Return the user snapshot
     # (now available in route handlers that use this dependency)
     return user
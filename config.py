@@ -19,6 +19,15 @@ from functools import lru_cache
 class Settings(BaseSettings):
     # 🗄️ Database configuration
     database_url: str  # The connection string to ur database (e.g.PostgreSQL)
+    # Connection pool size, *per worker process*
+    # Every gunicorn worker (see gunicorn_conf.py, default 2 x CPU + 1) has
+    # its own pool, so the most connections the app can open is:
+    #   workers x (db_pool_size + db_max_overflow)
+    # Keep that below Postgres' max_connections (100 by default, often
+    # less on small RDS instances), leaving room for admin/migration tools.
+    # Example: 9 workers x (5 + 5) = 90 connections.
+    db_pool_size: int = 5        # Connections kept open and reused
+    db_max_overflow: int = 5     # Extra connections allowed during spikes
 
     # ☁️ AWS S3 configuration
     aws_access_key_id: str          # AWS access key (from IAM user or role)
@@ -26,11 +35,23 @@ class Settings(BaseSettings):
     aws_region: str                 # AWS region (e.g. "us-east-1")
     s3_bucket_name: str         # The S3 bucket name where files will be stored
 
+    # 🌍 Environment ("development" or "production")
+    # In production the API docs (/docs, /redoc, /openapi.json) are disabled
+    environment: str = "development"
+
     # 🔒 Security and JWT settings
     secret_key: str           # Your app’s secret key (used for signing tokens)
     algorithm: str = "HS256"      # The JWT signing algorithm (default = HS256)
     access_token_expire_minutes: int = 30  # Expiration time for access tokens
 
+    # 🔑 Password hashing (argon2id; old bcrypt hashes are upgraded on login)
+    # argon2_rounds: passes over memory, hashing time grows linearly with it
+    # argon2_memory_cost: memory used per hash, in KiB (65536 = 64MB)
+    # CI/tests can lower both (e.g. ARGON2_ROUNDS=1, ARGON2_MEMORY_COST=1024)
+    # to make register/login almost free.
+    argon2_rounds: int = 3
+    argon2_memory_cost: int = 65536
+
     # Inner class that tells Pydantic where to load environment variables from
     class Config:
         # This means the values will be loaded from a file named ".env"
@@ -0,0 +1,48 @@
+# -------------------------------
+# 🚀 gunicorn_conf.py (Production Server Configuration)
+# -------------------------------
+# Run the app with:
+#   gunicorn main:app -c gunicorn_conf.py
+#
+# gunicorn manages the worker processes; each worker runs uvicorn with
+# uvloop (libuv-based event loop) and httptools (C HTTP parser), which are
+# both faster than the pure-Python/asyncio defaults.
+
+import os
+
+from uvicorn.workers import UvicornWorker  # type: ignore
+
+
+# -------------------------------
+# ⚙️ Uvicorn worker
+# -------------------------------
+# Force uvloop + httptools instead of letting uvicorn pick ("auto"), and
+# turn off uvicorn's per-request access log line.
+class MediaPlatformWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "access_log": False,
+    }
+
+
+worker_class = "gunicorn_conf.MediaPlatformWorker"
+
+# -------------------------------
+# 👷 Worker processes
+# -------------------------------
+# Common rule of thumb: (2 x CPU cores) + 1
+# Can be overridden with the WEB_CONCURRENCY environment variable
+workers = int(
+    os.getenv("WEB_CONCURRENCY", (2 * (os.cpu_count() or 1)) + 1)
+)
+
+# Address to listen on (override with the BIND environment variable)
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# -------------------------------
+# 📝 Logging
+# -------------------------------
+# No access log (one formatted line per request); errors still go to stderr
+accesslog = None
+errorlog = "-"
@@ -5,15 +5,25 @@ from fastapi import (  # type: ignore
     status,
     UploadFile,
     File,
-    Form
+    Form,
+    Request,
+    Response,
 )
+from fastapi.concurrency import run_in_threadpool  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
-from sqlalchemy.orm import Session  # type: ignore
-from typing import List
+from fastapi.responses import ORJSONResponse  # type: ignore
+from sqlalchemy import bindparam, select  # type: ignore
+from sqlalchemy.orm import Session, joinedload, selectinload  # type: ignore
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import json
+import os
+import anyio  # type: ignore
 import models
 import schemas
 import auth
 import s3_service
+from config import get_settings
 from database import engine, get_db
 
 
@@ -21,11 +31,28 @@ from database import engine, get_db
 models.Base.metadata.create_all(bind=engine)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep one S3 client (and its connection pool) open for the whole app
+    async with s3_service.s3_client_lifespan():
+        yield
+
+
+settings = get_settings()
+# Don't expose the interactive docs or the OpenAPI schema in production
+_IS_PROD = settings.environment == "production"
+
 # Initialize FasAPI App
 app = FastAPI(
     title="Media Upload Platform",
     description="Upload images & videos to AWS S3 with FastAPI + RDS",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes JSON responses much faster than the stdlib encoder
+    default_response_class=ORJSONResponse,
+    docs_url=None if _IS_PROD else "/docs",
+    redoc_url=None if _IS_PROD else "/redoc",
+    openapi_url=None if _IS_PROD else "/openapi.json",
+    lifespan=lifespan
 )
 # CORS middleware (for frontend)
 app.add_middleware(
@@ -36,43 +63,113 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ========================================
+# QUERIES
+# ========================================
+# Built once at import; SQLAlchemy caches the compiled SQL for each
+# statement, so routes only bind parameter values per request.
+
+# Two single-index probes instead of one OR (which can't use both indexes)
+_USER_ID_BY_EMAIL = select(models.User.id).where(
+    models.User.email == bindparam("email")
+)
+_USER_ID_BY_USERNAME = select(models.User.id).where(
+    models.User.username == bindparam("username")
+)
+# Login accepts either a username or an email in the same field
+_USER_BY_LOGIN = select(models.User).where(
+    (models.User.username == bindparam("u")) |
+    (models.User.email == bindparam("u"))
+)
+_USER_BY_USERNAME = select(models.User).where(
+    models.User.username == bindparam("username")
+)
+# Owners are eager-loaded (see get_all_posts / get_post)
+_ALL_POSTS = select(models.Post).options(selectinload(models.Post.owner))
+_POST_BY_ID = select(models.Post).options(
+    joinedload(models.Post.owner)
+).where(models.Post.id == bindparam("post_id"))
+_POSTS_BY_OWNER = select(models.Post).where(
+    models.Post.owner_id == bindparam("owner_id")
+)
+
 # ========================================
 # ROOT & HEALTH CHECK
 # ========================================
 
 
-@app.get("/")
-def root():
-    return {
-        "messaged": "Media upaload from api",
-        "docs": "/docs",
-        "version": "1.0.0"
-    }
+# These take no parameters and no dependencies, so they are mounted as plain
+# Starlette routes: no dependency solving, no response validation, and the
+# body is serialized once at import time.
+# The docs link is left out in production, where /docs is disabled
+_ROOT_BODY = json.dumps({
+    "messaged": "Media upaload from api",
+    **({} if _IS_PROD else {"docs": "/docs"}),
+    "version": "1.0.0"
+}).encode()
+_HEALTH_BODY = json.dumps({"status": "Healthy"}).encode()
 
 
-@app.get("/health")
-def health_check():
-    return {"status": "Healthy"}
+async def root(request: Request) -> Response:
+    return Response(_ROOT_BODY, media_type="application/json")
+
+
+async def health_check(request: Request) -> Response:
+    return Response(_HEALTH_BODY, media_type="application/json")
+
+
+app.router.add_route("/", root, methods=["GET"])
+app.router.add_route("/health", health_check, methods=["GET"])
 
 
 # ========================================
 # AUTHENTICATION ROUTES
 # ========================================
 
+# Password hashing is CPU-bound, so it gets its own limiter sized to the CPU
+# count instead of competing with I/O-bound handlers for the default
+# threadpool. Created lazily: anyio needs a running event loop to build it.
+_HASH_POOL: Optional[anyio.CapacityLimiter] = None
+
+
+async def run_hasher(func, *args):
+    """Run a password hashing function on the hashing limiter"""
+    global _HASH_POOL
+    if _HASH_POOL is None:
+        _HASH_POOL = anyio.CapacityLimiter(os.cpu_count() or 1)
+    return await anyio.to_thread.run_sync(func, *args, limiter=_HASH_POOL)
+
+
+# The auth routes are async (so hashing can await the limiter above), which
+# means their blocking DB calls must be sent to the threadpool explicitly,
+# the same way get_current_user does.
+def _email_or_username_taken(db: Session, email: str, username: str) -> bool:
+    return bool(
+        db.execute(_USER_ID_BY_EMAIL, {"email": email}).scalar() or
+        db.execute(_USER_ID_BY_USERNAME, {"username": username}).scalar()
+    )
+
+
+def _find_login_user(db: Session, login: str) -> Optional[models.User]:
+    return db.execute(_USER_BY_LOGIN, {"u": login}).scalars().first()
+
+
+def _add_and_commit(db: Session, obj) -> None:
+    db.add(obj)
+    db.commit()
+
+
 @app.post(
     "/auth/register",
     response_model=schemas.UserResponse,
     status_code=status.HTTP_201_CREATED
 )
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     # Check if user exists
-    existing_user = db.query(models.User).filter(
-        (models.User.email == user.email) |
-        (models.User.username == user.username)
-    ).first()
-
-    if existing_user:
+    if await run_in_threadpool(
+        _email_or_username_taken, db, user.email, user.username
+    ):
         raise HTTPException(
             status_code=400, detail="Email or username already registered"
         )
@@ -80,41 +177,46 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db_user = models.User(
         email=user.email,
         username=user.username,
-        hashed_password=auth.hash_password(user.password),
+        hashed_password=await run_hasher(auth.hash_password, user.password),
         full_name=user.full_name
     )
 
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await run_in_threadpool(_add_and_commit, db, db_user)
+    # Make sure no stale entry for a reused id survives in the user cache
+    auth.invalidate_user(db_user.id)
 
     return db_user
 
 
 @app.post("/auth/login", response_model=schemas.Token)
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
     """Login and get access token"""
 
     # Find user by username OR email
-    db_user = db.query(models.User).filter(
-        (models.User.username == user.username) | 
-        (models.User.email == user.username)
-    ).first()
+    db_user = await run_in_threadpool(_find_login_user, db, user.username)
 
-    if not db_user or not auth.verify_password(
-        user.password, db_user.hashed_password
+    if not db_user or not await run_hasher(
+        auth.verify_password, user.password, db_user.hashed_password
     ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
+    # Password is verified, so upgrade bcrypt or outdated argon2 hashes
+    if auth.needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = await run_hasher(
+            auth.hash_password, user.password
+        )
+        await run_in_threadpool(db.commit)
     # Create token
-    access_token = auth.create_access_token(data={"sub": db_user.id})
+    access_token = auth.create_access_token(data={"sub": str(db_user.id)})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @app.get("/auth/me", response_model=schemas.UserResponse)
-def get_me(current_user: models.User = Depends(auth.get_current_user)):
+async def get_me(
+    current_user: auth.CachedUser = Depends(auth.get_current_user)
+):
     """Get current user info"""
     return current_user
 # ========================================
@@ -130,13 +232,15 @@ async def upload_image(
     title: str = Form(...),
     description: str = Form(None),
     file: UploadFile = File(...),
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.CachedUser = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """Upload an image"""
 
     # Upload to S3
-    s3_url, file_size = s3_service.upload_to_s3(file, current_user.id, "image")
+    s3_url, file_size = await s3_service.upload_to_s3(
+        file, current_user.id, "image"
+    )
 
     # Create post in database
     db_post = models.Post(
@@ -148,17 +252,10 @@ async def upload_image(
         owner_id=current_user.id
     )
 
-    db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await run_in_threadpool(_add_and_commit, db, db_post)
 
     # Add owner username for response
-    response = schemas.PostResponse(
-        **db_post.__dict__,
-        owner_username=current_user.username
-    )
-
-    return response
+    return schemas.PostResponse.from_post(db_post, current_user.username)
 
 
 @app.post(
@@ -169,13 +266,15 @@ async def upload_video(
     title: str = Form(...),
     description: str = Form(None),
     file: UploadFile = File(...),
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.CachedUser = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """Upload a video"""
 
     # Upload to S3
-    s3_url, file_size = s3_service.upload_to_s3(file, current_user.id, "video")
+    s3_url, file_size = await s3_service.upload_to_s3(
+        file, current_user.id, "video"
+    )
 
     # Create post in database
     db_post = models.Post(
@@ -187,16 +286,9 @@ async def upload_video(
         owner_id=current_user.id
     )
 
-    db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
-
-    response = schemas.PostResponse(
-        **db_post.__dict__,
-        owner_username=current_user.username
-    )
+    await run_in_threadpool(_add_and_commit, db, db_post)
 
-    return response
+    return schemas.PostResponse.from_post(db_post, current_user.username)
 
 # ========================================
 # POST CRUD ROUTES
@@ -213,32 +305,31 @@ def get_all_posts(
 ):
     """Get all posts (paginated)"""
 
-    posts = db.query(models.Post).offset(skip).limit(limit).all()
+    # Load every owner in one extra query instead of one query per post
+    posts = db.execute(
+        _ALL_POSTS.offset(skip).limit(limit)
+    ).scalars().all()
 
     # Add owner username to each post
-    response = []
-    for post in posts:
-        response.append(schemas.PostResponse(
-            **post.__dict__,
-            owner_username=post.owner.username
-        ))
-
-    return response
+    return [
+        schemas.PostResponse.from_post(post, post.owner.username)
+        for post in posts
+    ]
 
 
 @app.get("/posts/{post_id}", response_model=schemas.PostResponse)
 def get_post(post_id: int, db: Session = Depends(get_db)):
     """Get a single post"""
 
-    post = db.query(models.Post).filter(models.Post.id == post_id).first()
+    # Single row, so JOIN the owner in rather than a second SELECT
+    post = db.execute(
+        _POST_BY_ID, {"post_id": post_id}
+    ).scalar_one_or_none()
 
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    return schemas.PostResponse(
-        **post.__dict__,
-        owner_username=post.owner.username
-    )
+    return schemas.PostResponse.from_post(post, post.owner.username)
 
 
 @app.get(
@@ -248,34 +339,39 @@ def get_post(post_id: int, db: Session = Depends(get_db)):
 def get_user_posts(username: str, db: Session = Depends(get_db)):
     """Get all posts by a specific user"""
 
-    user = db.query(models.User).filter(
-        models.User.username == username
-        ).first()
+    user = db.execute(
+        _USER_BY_USERNAME, {"username": username}
+    ).scalar_one_or_none()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    posts = db.query(models.Post).filter(models.Post.owner_id == user.id).all()
+    posts = db.execute(
+        _POSTS_BY_OWNER, {"owner_id": user.id}
+    ).scalars().all()
 
-    response = []
-    for post in posts:
-        response.append(schemas.PostResponse(
-            **post.__dict__,
-            owner_username=user.username
-        ))
+    return [
+        schemas.PostResponse.from_post(post, user.username)
+        for post in posts
+    ]
 
-    return response
+
+def _delete_and_commit(db: Session, obj) -> None:
+    db.delete(obj)
+    db.commit()
 
 
 @app.delete("/posts/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_post(
+async def delete_post(
     post_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.CachedUser = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a post (only owner can delete)"""
 
-    post = db.query(models.Post).filter(models.Post.id == post_id).first()
+    # Async route (the S3 delete is awaited), so blocking DB calls go to
+    # the threadpool
+    post = await run_in_threadpool(db.get, models.Post, post_id)
 
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -287,10 +383,9 @@ def delete_post(
         )
 
     # Delete from S3
-    s3_service.delete_from_s3(post.media_url)
+    await s3_service.delete_from_s3(post.media_url)
 
     # Delete from database
-    db.delete(post)
-    db.commit()
+    await run_in_threadpool(_delete_and_commit, db, post)
 
     return None
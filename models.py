@@ -40,7 +40,7 @@ class Post(Base):
     media_url = Column(String, nullable=False)  # S3 URL
     media_type = Column(Enum(MediaType), nullable=False)
     file_size = Column(Integer)
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     # Relationship
     owner = relationship("User", back_populates="posts")
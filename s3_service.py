@@ -1,36 +1,112 @@
-import boto3  # type: ignore
+import aioboto3  # type: ignore
+from aiobotocore.config import AioConfig  # type: ignore
+from boto3.s3.transfer import TransferConfig  # type: ignore
 from botocore.exceptions import ClientError  # type: ignore
 from fastapi import HTTPException, UploadFile  # type: ignore
 from config import get_settings
+from contextlib import asynccontextmanager
+import os
 import uuid
 # from datetime import datetime
 
 
 settings = get_settings()
 
-# Initialize S# client
-s3_client = boto3.client(
-    's3',
+# aioboto3 session holding the AWS credentials
+session = aioboto3.Session(
     aws_access_key_id=settings.aws_access_key_id,
     aws_secret_access_key=settings.aws_secret_access_key,
     region_name=settings.aws_region,
 )
+# Client config: a connection pool big enough for concurrent uploads
+# (botocore's default is 10) and adaptive retries for throttling.
+# Connections are reused between requests through aiohttp's HTTP
+# keep-alive, which the shared client gets by default.
+s3_config = AioConfig(
+    max_pool_connections=100,
+    retries={"max_attempts": 3, "mode": "adaptive"},
+)
+# Public URL prefix for uploaded objects (object key is appended to it)
+_S3_URL_PREFIX = (
+    f"https://{settings.s3_bucket_name}.s3.{settings.aws_region}"
+    ".amazonaws.com/"
+)
+# Shared async S3 client, opened once for the app's lifetime
+# by s3_client_lifespan() (see the lifespan in main.py)
+s3_client = None
+
+
+@asynccontextmanager
+async def s3_client_lifespan():
+    """Open the shared S3 client on startup and close it on shutdown"""
+    global s3_client
+    async with session.client('s3', config=s3_config) as client:
+        s3_client = client
+        try:
+            yield
+        finally:
+            s3_client = None
+
 
-ALLOWED_IMAGE_TYPES = [
+ALLOWED_IMAGE_TYPES = frozenset({
     "image/jpeg",
     "image/jpg",
     "image/png",
     "image/gif",
     "image/webp",
-]
-ALLOWED_VIDEO_TYPES = [
+})
+ALLOWED_VIDEO_TYPES = frozenset({
     "video/mp4",
     "video/mpeg",
     "video/quicktime",
     "video/x-msvideo",
-]
+})
+# Error messages are built once, not on every rejected upload
+_INVALID_IMAGE_DETAIL = (
+    f"Invalid image type. Allowed {', '.join(sorted(ALLOWED_IMAGE_TYPES))}"
+)
+_INVALID_VIDEO_DETAIL = (
+    f"Invalid video type. Allowed {', '.join(sorted(ALLOWED_VIDEO_TYPES))}"
+)
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
 MAX_VIDEO_SIZE = 100 * 1024 * 1024  # 100MB
+# Files up to this size are sent with a single put_object; bigger ones
+# use a multipart upload (create + one request per part + complete)
+MULTIPART_THRESHOLD = 8 * 1024 * 1024  # 8MB
+# Multipart settings: 8MB parts, at most 2 parts uploading at once.
+# The io queue must be able to hold every part of the largest allowed file:
+# if a part upload fails, aioboto3 stops its uploaders, and a reader stuck
+# on put() into a full queue would then hang the request forever. This
+# means a slow network can still leave most of a large video buffered.
+# aioboto3's upload_fileobj ignores multipart_threshold and always does a
+# multipart upload, so upload_to_s3 applies the threshold itself.
+_MAX_PARTS = -(-MAX_VIDEO_SIZE // MULTIPART_THRESHOLD)  # ceil -> 13
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_chunksize=MULTIPART_THRESHOLD,
+    max_concurrency=2,
+    max_io_queue=_MAX_PARTS + 1,
+)
+
+
+class LimitedReader:
+    """
+    Read-only file wrapper that counts bytes and fails past a size limit
+    Lets boto3 stream the upload in chunks instead of reading it all at once
+    """
+
+    def __init__(self, file: UploadFile, limit: int, detail: str):
+        self.file = file
+        self.limit = limit
+        self.detail = detail
+        self.bytes_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        # UploadFile.read() moves disk reads off the event loop
+        chunk = await self.file.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.limit:
+            raise HTTPException(status_code=400, detail=self.detail)
+        return chunk
 
 
 def validate_file(file: UploadFile, media_type: str) -> None:
@@ -38,22 +114,18 @@ def validate_file(file: UploadFile, media_type: str) -> None:
     if media_type == "image":
         if file.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(
-                status_code=400,
-                detail=f"Invalid image type. Allowed {
-                    ', '.join(ALLOWED_IMAGE_TYPES)
-                    }"
+                status_code=400, detail=_INVALID_IMAGE_DETAIL
             )
     elif media_type == "video":
         if file.content_type not in ALLOWED_VIDEO_TYPES:
             raise HTTPException(
-                status_code=400,
-                detail=f"Invalid video type. Allowed {
-                    ', '.join(ALLOWED_VIDEO_TYPES)
-                    }"
+                status_code=400, detail=_INVALID_VIDEO_DETAIL
             )
 
 
-def upload_to_s3(file: UploadFile, user_id: int, media_type: str) -> tuple:
+async def upload_to_s3(
+    file: UploadFile, user_id: int, media_type: str
+) -> tuple:
     """
     Upload file to S3 bucket
     Returns: (s3_url, file_size)
@@ -62,33 +134,44 @@ def upload_to_s3(file: UploadFile, user_id: int, media_type: str) -> tuple:
         # Validate file
         validate_file(file, media_type)
         # Generate a unique filename
-        file_extension = file.filename.split('.')[-1]
-        file_id = uuid.uuid4()
+        # Fall back to a default extension when the upload has none
+        file_extension = os.path.splitext(file.filename or "")[1].lstrip(".")
+        if not file_extension:
+            file_extension = "jpg" if media_type == "image" else "mp4"
+        file_id = uuid.uuid4().hex
         unique_filename = f"{media_type}s/{user_id}/{file_id}.{file_extension}"
 
-        # Read file content
-        fille_content = file.file.read()
-        file_size = len(fille_content)
-        # Check file size
-        if media_type == "image" and file_size > MAX_IMAGE_SIZE:
-            raise HTTPException(
-                status_code=400, detail="Image too large (max 10MB)"
+        # Pick the size limit for this media type
+        if media_type == "image":
+            limit, detail = MAX_IMAGE_SIZE, "Image too large (max 10MB)"
+        else:
+            limit, detail = MAX_VIDEO_SIZE, "Video too large (max 100MB)"
+        # Reject early when the size is already known from the request
+        if file.size is not None and file.size > limit:
+            raise HTTPException(status_code=400, detail=detail)
+        # The reader enforces the limit as bytes are read either way
+        # (file.size can be missing)
+        reader = LimitedReader(file, limit, detail)
+        if file.size is not None and file.size <= MULTIPART_THRESHOLD:
+            # Small file: one PUT request, body is at most 8MB
+            await s3_client.put_object(
+                Bucket=settings.s3_bucket_name,
+                Key=unique_filename,
+                Body=await reader.read(),
+                ContentType=file.content_type,
             )
-        if media_type == "video" and file_size > MAX_VIDEO_SIZE:
-            raise HTTPException(
-                status_code=400, detail="Video too large (max 100MB)"
+        else:
+            # Large or unknown size: multipart upload, streamed part by part
+            await s3_client.upload_fileobj(
+                reader,
+                settings.s3_bucket_name,
+                unique_filename,
+                ExtraArgs={"ContentType": file.content_type},
+                Config=_TRANSFER_CONFIG,
             )
-        # Uplaod to S3
-        s3_client.put_object(
-            Bucket=settings.s3_bucket_name,
-            Key=unique_filename,
-            Body=fille_content,
-            ContentType=file.fille_content,
-        )
+        file_size = reader.bytes_read
         # Generate S3 Url
-        buckt = settings.s3_bucket_name
-        region = settings.aws_region
-        s3_url = f"https://{buckt}.s3.{region}.amazonaws.com/{unique_filename}"
+        s3_url = _S3_URL_PREFIX + unique_filename
 
         return s3_url, file_size
     except ClientError as e:
@@ -96,20 +179,19 @@ def upload_to_s3(file: UploadFile, user_id: int, media_type: str) -> tuple:
             status_code=500, detail=f"S3 upload  failed: {str(e)}"
         )
     finally:
-        file.file.close()
+        await file.close()
 
 
-def delete_from_s3(s3_url: str) -> None:
+async def delete_from_s3(s3_url: str) -> None:
     """Delete file from S3"""
     try:
-        # Extract key from url
-        region = settings.aws_region
-        b = f"{settings.s3_bucket_name}.s3.{region}.amazonaws.com/"
-        key = s3_url.split(b)[1]
+        # Extract key from url (everything after the prefix we built it with)
+        # Not urlsplit: keys can contain "?" or "#" from the client's filename
+        key = s3_url.removeprefix(_S3_URL_PREFIX)
 
-        s3_client.delete_object(
+        await s3_client.delete_object(
             Bucket=settings.s3_bucket_name,
-            key=key
+            Key=key
         )
     except ClientError as e:
         raise HTTPException(
@@ -51,8 +51,26 @@ class PostResponse(BaseModel):
     media_type: MediaType
     file_size: int
     owner_id: int
-    owner_username: int
+    owner_username: str
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+    @classmethod
+    def from_post(cls, post, owner_username: str) -> "PostResponse":
+        """
+        Build from a Post row, copying only the schema's fields
+        (FastAPI still validates the result against response_model)
+        """
+        return cls.model_construct(
+            id=post.id,
+            title=post.title,
+            description=post.description,
+            media_url=post.media_url,
+            media_type=post.media_type,
+            file_size=post.file_size,
+            owner_id=post.owner_id,
+            owner_username=owner_username,
+            created_at=post.created_at,
+        )
@@ -0,0 +1,90 @@
+import asyncio
+import io
+import os
+
+# s3_service reads its settings at import time
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("S3_BUCKET_NAME", "test-bucket")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest  # noqa: E402
+from aioboto3.s3.inject import upload_fileobj  # noqa: E402
+from botocore.exceptions import ClientError  # noqa: E402
+from fastapi import HTTPException, UploadFile  # noqa: E402
+from starlette.datastructures import Headers  # noqa: E402
+
+import s3_service  # noqa: E402
+
+
+class FailingPartClient:
+    """Fake S3 client where part 1 fails and every other part succeeds"""
+
+    upload_fileobj = upload_fileobj
+
+    def __init__(self):
+        self.aborted = False
+
+    async def create_multipart_upload(self, **kwargs):
+        return {"UploadId": "upload-1"}
+
+    async def upload_part(self, **kwargs):
+        # Slow enough for the reader to fill the io queue before the failure
+        await asyncio.sleep(0.05)
+        if kwargs["PartNumber"] == 1:
+            raise ClientError(
+                {"Error": {"Code": "InternalError", "Message": "boom"}},
+                "UploadPart",
+            )
+        await asyncio.sleep(0.05)
+        return {"ETag": f"etag-{kwargs['PartNumber']}"}
+
+    async def abort_multipart_upload(self, **kwargs):
+        self.aborted = True
+
+    async def complete_multipart_upload(self, **kwargs):
+        raise AssertionError("upload should not complete")
+
+
+def test_failed_part_aborts_instead_of_hanging(monkeypatch):
+    client = FailingPartClient()
+    monkeypatch.setattr(s3_service, "s3_client", client)
+    size = 60 * 1024 * 1024
+    file = UploadFile(
+        io.BytesIO(b"\0" * size),
+        size=size,
+        filename="clip.mp4",
+        headers=Headers({"content-type": "video/mp4"}),
+    )
+
+    async def upload():
+        return await asyncio.wait_for(
+            s3_service.upload_to_s3(file, 1, "video"), timeout=10
+        )
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(upload())
+    assert exc_info.value.status_code == 500
+    assert client.aborted
+
+
+class RecordingDeleteClient:
+    """Fake S3 client that records deleted keys"""
+
+    def __init__(self):
+        self.deleted = []
+
+    async def delete_object(self, Bucket, Key):
+        self.deleted.append(Key)
+
+
+def test_delete_keeps_query_and_fragment_characters_in_key(monkeypatch):
+    client = RecordingDeleteClient()
+    monkeypatch.setattr(s3_service, "s3_client", client)
+    key = "videos/1/abc.mp4#1?x=2"
+
+    asyncio.run(s3_service.delete_from_s3(s3_service._S3_URL_PREFIX + key))
+
+    assert client.deleted == [key]